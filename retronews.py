@@ -17,25 +17,32 @@ import argparse
 import curses
 import curses.textpad
 import dataclasses
+import gzip
 import html.parser
+import http.client
 import json
 import logging
 import os
 import re
 import sqlite3
+import threading
+import time
 import traceback
 import unicodedata
+import urllib.error
+import urllib.parse
 import urllib.request
 import webbrowser
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from functools import partial, reduce
-from textwrap import wrap
+from functools import partial
+from textwrap import TextWrapper, wrap
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
-    Generator,
+    Iterator,
     Literal,
     NewType,
     Optional,
@@ -46,6 +53,12 @@ from typing import (
     overload,
 )
 
+try:
+    # Optional C-backed parser, noticeably faster on large HN threads
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore[assignment]
+
 KEY_BINDINGS: dict[int, Callable[["AppState"], None]] = {
     ord("q"): lambda app: cmd_quit(app),
     ord("?"): lambda app: cmd_help(app),
@@ -140,20 +153,84 @@ COLORS: dict[Color, tuple[int, int]] = {
     "url": (curses.COLOR_MAGENTA, -1),
 }
 
+# Colors of pager lines starting with given prefixes, grouped by their first two characters
+PAGER_PREFIX_COLORS: dict[str, tuple[tuple[str, Color], ...]] = {
+    "Co": (("Content-Location: ", "tree"),),
+    "Da": (("Date: ", "date"),),
+    "Fr": (("From: ", "author"),),
+    "Su": (("Subject: ", "header_subject"),),
+    ">>": ((">>", "nested_quote"),),
+    "> ": (("> >", "nested_quote"), ("> ", "quote")),
+    "| ": (("| ", "code"),),
+}
+
+# Colors of specific pager lines
+PAGER_LINE_COLORS: dict[str, Color] = {
+    "~": "empty_pager_line",
+    "<deleted>": "deleted_message_pager_line",
+    "[dead]": "deleted_message_pager_line",
+}
+
+# Max number of distinct pager lines to keep styled runs for, see app_render_pager_line()
+PAGER_RUNS_CACHE_SIZE = 10000
+
 REQUEST_TIMEOUT = 10
 
-# Recognize ">text", "> text", ">>text", ">> text", etc.
-QUOTE_REX = re.compile(r"^(> ?)+")
+HTTP_MAX_REDIRECTS = 5
+
+# Persistent connections by (thread id, scheme, host), see http_connection()
+HTTP_CONNECTIONS: dict[tuple[int, str, str], http.client.HTTPConnection] = {}
+
+# Base directory for cache files, relative paths in XDG_CACHE_HOME are invalid according to the spec
+CACHE_HOME = os.environ.get("XDG_CACHE_HOME", "")
+CACHE_HOME = CACHE_HOME if os.path.isabs(CACHE_HOME) else "~/.cache"
+
+# Directory for caching fetched HN threads, disabled if None, enabled with --cache, see hn_fetch_entry()
+HN_CACHE_DIR: Optional[str] = None
+
+# Max age of cached HN threads in seconds
+HN_CACHE_TTL = 600
+
+# Background fetching of threads likely to be opened next
+PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Max age of prefetched threads in seconds, older ones are fetched again when opened
+PREFETCH_TTL = 300
+
+# Concurrent fetching of threads that can only be requested one by one, kept small to be polite
+FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Translation table removing control characters except for \n and \t, see text_sanitize()
+# All characters of the Cc category are below U+00A0, and Unicode guarantees it won't change
+CONTROL_CHARS_TABLE = dict.fromkeys(
+    c for c in range(0xA0) if unicodedata.category(chr(c)) == "Cc" and chr(c) not in ("\n", "\t")
+)
+
+# Recognize runs of whitespace in html text
+WHITESPACE_REX = re.compile(r"[\r\n\t ]+")
+
+# Recognize line breaks with surrounding spaces
+PADDED_NEWLINE_REX = re.compile(r" *\n *")
 
 # Recognize "[n] link", "[n]: link", "[n] - link", etc.
 REFERENCE_REX = re.compile(r"^\[\d+\][ :-]*https?://[^ ]*$")
 
+# Selected entities unescaped in raw mode for better readability, see msg_build_raw_lines()
+RAW_ENTITIES = {"&#x2F;": "/", "&#x27;": "'", "&quot;": '"'}
+RAW_ENTITY_REX = re.compile("|".join(map(re.escape, RAW_ENTITIES)))
+
 # Recognize http/https URLs
 URL_REX = re.compile(r"(https?://[^\s\)\"<,]+[^\s\)\"<,\.])")
 
 # Recognize HN message URLs
 HN_URL_REX = re.compile(r"^https://news\.ycombinator\.com/item\?id=(\d+)$")
 
+# Recognize links to HN messages on HN listing pages
+HN_ITEM_HREF_REX = re.compile(r'href="item\?id=(\d+)"')
+
+# Shared by all text_wrap() calls instead of constructing a new wrapper per paragraph
+TEXT_WRAPPER = TextWrapper(break_on_hyphens=False, break_long_words=False)
+
 # FIXME: Use TypeAlias after migrating to Python 3.10
 DB = NewType("DB", "sqlite3.Connection")
 
@@ -166,6 +243,10 @@ else:
 
 T = TypeVar("T")
 
+# Slots make instances smaller and attribute access faster, but are only supported since Python 3.10.
+# FIXME: Use slots=True directly after migrating to Python 3.10
+DATACLASS_SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class ExitException(Exception):
     code: int
@@ -191,7 +272,7 @@ PROVIDERS: dict[str, Provider] = {
     ),
     "lb": Provider(
         fetch_thread=lambda msg_id: lb_fetch_thread(msg_id),
-        fetch_threads_by_id=lambda msg_ids: [lb_fetch_thread(x) for x in msg_ids],
+        fetch_threads_by_id=lambda msg_ids: lb_fetch_threads_by_id(msg_ids),
     ),
 }
 
@@ -214,13 +295,14 @@ GROUP_TABS: list[Group] = [
 ]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(**DATACLASS_SLOTS)
 class MessageFlags:
     read: bool = False
     starred: bool = False
 
 
-@dataclasses.dataclass
+# Messages are compared by identity, comparing fields would recurse through the whole thread
+@dataclasses.dataclass(eq=False, **DATACLASS_SLOTS)
 class Message:
     msg_id: str
     thread_id: str
@@ -230,6 +312,8 @@ class Message:
     title: str
     body: Optional[str] = None
     lines: list[str] = dataclasses.field(default_factory=list)
+    rendered_lines: Optional[list[str]] = None
+    raw_lines: Optional[list[str]] = None
     parent: Optional["Message"] = None
     children: Optional[list["Message"]] = None
     flags: MessageFlags = dataclasses.field(default_factory=MessageFlags)
@@ -237,6 +321,16 @@ class Message:
     total_comments: int = 0
     index_position: int = 0
     index_tree: str = ""
+    date_str: str = dataclasses.field(init=False, default="")
+    author_str: str = dataclasses.field(init=False, default="")
+    index_row: str = ""
+    index_row_key: Optional[tuple[Optional[int], str, bool]] = None
+
+    def __post_init__(self) -> None:
+        # Format once, these columns are shown on every render of the index
+        # Same as strftime("%Y-%m-%d %H:%M") for naive dates, but several times faster
+        self.date_str = self.date.isoformat(" ", "minutes")
+        self.author_str = (self.author or "<unknown>")[:10].ljust(10)
 
     @property
     def is_read(self) -> bool:
@@ -287,6 +381,18 @@ class AppState:
     pager_offset: int = 0
     raw_mode: bool = False
     flash: Optional[str] = None
+    # Threads fetched in the background by thread id, along with the monotonic time of the fetch
+    prefetched_threads: dict[str, tuple[float, Future[Message]]] = dataclasses.field(default_factory=dict)
+    # Styled runs by pager line text, shared by all messages since they only depend on the text
+    pager_runs: dict[str, list[tuple[str, int]]] = dataclasses.field(default_factory=dict)
+    dirty: bool = True
+    # What was drawn on each index row, to skip redrawing unchanged rows, see app_render_index()
+    index_rows: list[Optional[tuple[Message, tuple[Any, ...]]]] = dataclasses.field(default_factory=list)
+    index_offset: int = 0
+    # What was drawn in the pager, to skip redrawing it if unchanged, see app_render_pager()
+    pager_drawn: Optional[tuple[Message, list[str], int, int, int]] = None
+    # What was drawn in each menu, to skip redrawing unchanged ones, see app_render_top_menu()
+    menus_drawn: dict[str, tuple[Any, ...]] = dataclasses.field(default_factory=dict)
 
 
 class HNSearchHit(TypedDict):
@@ -337,7 +443,7 @@ HTML_KNOWN_TAGS = HTML_BLOCK_TAGS.union(HTML_INLINE_TAGS)
 HTML_AUTOCLOSE_TAGS = set(("hr", "br"))
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(**DATACLASS_SLOTS)
 class HTMLNode:
     tag: str
 
@@ -365,16 +471,10 @@ class HTMLParser(html.parser.HTMLParser):
         self.root_node = self.current_node = HTMLNode(tag="root")
 
     def handle_data(self, data: str) -> None:
-        if self.current_node.tag in HTML_AUTOCLOSE_TAGS:
-            self.handle_endtag(self.current_node.tag)
-
         node = HTMLNode(tag="text", text=data, pre=self.pre_level > 0)
         html_node_append(self.current_node, node)
 
     def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
-        if self.current_node.tag in HTML_AUTOCLOSE_TAGS:
-            self.handle_endtag(self.current_node.tag)
-
         if tag not in HTML_KNOWN_TAGS:
             return
 
@@ -383,10 +483,13 @@ class HTMLParser(html.parser.HTMLParser):
 
         node = HTMLNode(tag=tag, attrs=dict(attrs), pre=self.pre_level > 0)
         html_node_append(self.current_node, node)
-        self.current_node = node
+
+        # Autoclosing tags have no content, so they're closed right away instead of on the next token
+        if tag not in HTML_AUTOCLOSE_TAGS:
+            self.current_node = node
 
     def handle_endtag(self, tag: str) -> None:
-        if tag not in HTML_KNOWN_TAGS:
+        if tag not in HTML_KNOWN_TAGS or tag in HTML_AUTOCLOSE_TAGS:
             return
 
         if tag == "pre":
@@ -404,6 +507,18 @@ class HTMLParser(html.parser.HTMLParser):
                 break
 
 
+def text_quote_prefix(text: str) -> str:
+    """Get leading quotation symbols, i.e. ">", "> ", ">>", ">> ", "> > ", etc."""
+
+    end = 0
+    length = len(text)
+
+    while end < length and text[end] == ">":
+        end += 2 if text.startswith(" ", end + 1) else 1
+
+    return text[:end]
+
+
 def text_wrap(text: str, width=70) -> str:
     if len(text) == 0:
         # Preserve empty lines
@@ -413,17 +528,20 @@ def text_wrap(text: str, width=70) -> str:
         # Preserve code indentation
         return text
 
-    if REFERENCE_REX.match(text):
+    if text.startswith("[") and REFERENCE_REX.match(text):
         # Keep reference numbers with long links in the same line
         return text
 
-    indent = ""
+    if len(text) <= width and text.isprintable():
+        # Fits in one line, which is all TextWrapper would return, minus trailing spaces
+        return text.rstrip()
 
-    if (match := QUOTE_REX.match(text)) is not None:
-        # Preserve quotation symbols in subsequent lines
-        indent = match[0]
+    # Preserve quotation symbols in subsequent lines
+    indent = text_quote_prefix(text)
 
-    lines = wrap(text, width, subsequent_indent=indent, break_on_hyphens=False, break_long_words=False)
+    TEXT_WRAPPER.width = width
+    TEXT_WRAPPER.subsequent_indent = indent
+    lines = TEXT_WRAPPER.wrap(text)
     lines = [line.rstrip() for line in lines]
 
     return "\n".join(lines)
@@ -450,29 +568,29 @@ def text_unindent(text: str) -> str:
 def text_sanitize(text: Optional[str]) -> str:
     # For safety, remove any control characters except for \n and \t
     # At least on HN some messages contain \x00 characters
+    return (text or "").translate(CONTROL_CHARS_TABLE)
 
-    text = text or ""
-    allowed_cc = set(("\n", "\t"))
-    chars = (c for c in text if c in allowed_cc or unicodedata.category(c) != "Cc")
-    text = "".join(chars)
 
-    return text
+def text_split_urls(text: str) -> list[tuple[str, bool]]:
+    """Split text into (part, is_url) runs"""
 
+    # Most lines have no urls, so don't bother running the regex for them
+    if "http" not in text:
+        return [(text, False)] if text else []
 
-def text_split_urls(text: str) -> list[str]:
-    return [p for p in URL_REX.split(text) if p != ""]
+    # URL_REX has a single capturing group, so split() alternates between text and urls
+    return [(p, i % 2 == 1) for i, p in enumerate(URL_REX.split(text)) if p != ""]
 
 
-def html_node_children(parent: HTMLNode) -> list[HTMLNode]:
-    ret: list[HTMLNode] = []
+def html_node_children(parent: HTMLNode) -> Iterator[HTMLNode]:
+    """Iterate over children, which must not be unlinked during iteration"""
+
     node = parent.first_child
 
     while node is not None:
-        ret.append(node)
+        yield node
         node = node.next_sibling
 
-    return ret
-
 
 def html_node_append(parent: HTMLNode, child: HTMLNode) -> None:
     if parent.first_child is None:
@@ -521,9 +639,9 @@ def html_node_trim_whitespace(node: HTMLNode) -> None:
         return
 
     text = node.text.strip("\r\n\t ")
-    text = re.sub(r"[\r\n\t ]+", " ", text)
+    text = WHITESPACE_REX.sub(" ", text)
     text = text.replace("\x00", "\n")
-    text = re.sub(r" *\n *", "\n", text)
+    text = PADDED_NEWLINE_REX.sub("\n", text)
 
     node.text = text
 
@@ -531,18 +649,32 @@ def html_node_trim_whitespace(node: HTMLNode) -> None:
 def html_node_process_inline(node: HTMLNode, inline=False) -> str:
     """Traverse tree flattening all inline nodes into text nodes"""
 
+    if node.tag == "text":
+        # Leaf text is always inline and already in its final form
+        return node.text
+
     if node.tag not in HTML_BLOCK_TAGS:
         # Never disable inline if already enabled
         inline = True
 
-    text = "".join(html_node_process_inline(c, inline) for c in html_node_children(node))
+    child = node.first_child
 
     if not inline:
+        # Text of block nodes is discarded, so only flatten their children
+        while child is not None:
+            html_node_process_inline(child, inline)
+            child = child.next_sibling
         return ""
 
-    if node.tag == "text":
-        text = node.text
-    elif node.tag == "br":
+    parts = []
+
+    while child is not None:
+        parts.append(html_node_process_inline(child, inline))
+        child = child.next_sibling
+
+    text = "".join(parts)
+
+    if node.tag == "br":
         text = "\x00"
     elif node.tag == "em" or node.tag == "i":
         text = f"/{text}/"
@@ -568,25 +700,32 @@ def html_node_process_inline(node: HTMLNode, inline=False) -> str:
 def html_node_process_text(node: HTMLNode):
     """Traverse tree merging, trimming and pruning text nodes"""
 
-    for child in html_node_children(node):
-        html_node_process_text(child)
+    stack = [node]
 
-    # Merge adjacent text nodes
-    for child in html_node_children(node):
-        prev = child.prev_sibling
-        if child.tag == "text" and prev is not None and prev.tag == "text" and child.pre == prev.pre:
-            child.text = prev.text + child.text
-            html_node_unlink(prev)
+    # Text nodes are leaves, so each parent's children can be handled in a single pass before descending
+    while stack:
+        text_node = stack.pop().first_child
 
-    # Trim whitespace from text nodes
-    for child in html_node_children(node):
-        if child.tag == "text":
-            html_node_trim_whitespace(child)
+        while text_node is not None:
+            if text_node.tag != "text":
+                stack.append(text_node)
+                text_node = text_node.next_sibling
+                continue
 
-    # Remove empty text nodes
-    for child in html_node_children(node):
-        if child.tag == "text" and child.text == "":
-            html_node_unlink(child)
+            # Merge adjacent text nodes, joining each run at once instead of concatenating pairwise
+            parts = [text_node.text]
+            while (sibling := text_node.next_sibling) and sibling.tag == "text" and sibling.pre == text_node.pre:
+                parts.append(sibling.text)
+                html_node_unlink(sibling)
+            text_node.text = "".join(parts)
+            next_node = text_node.next_sibling
+
+            html_node_trim_whitespace(text_node)
+
+            if text_node.text == "":
+                html_node_unlink(text_node)
+
+            text_node = next_node
 
 
 def html_node_render_block(node: HTMLNode, width=70) -> str:
@@ -642,25 +781,121 @@ def html_render(html: str) -> str:
 
     node = parser.root_node
 
+    # Dumping the tree costs about as much as rendering it, so skip it unless it's logged
+    log_trees = logging.getLogger().isEnabledFor(logging.DEBUG)
     log_sep = "\n" + "-" * 80 + "\n"
-    logging.debug(f"Initial HTML tree{log_sep}{html_node_dump(node)}{log_sep}")
+
+    if log_trees:
+        logging.debug(f"Initial HTML tree{log_sep}{html_node_dump(node)}{log_sep}")
 
     html_node_process_inline(node)
     html_node_process_text(node)
 
-    logging.debug(f"Processed HTML tree{log_sep}{html_node_dump(node)}{log_sep}")
+    if log_trees:
+        logging.debug(f"Processed HTML tree{log_sep}{html_node_dump(node)}{log_sep}")
 
     return html_node_render_block(node)
 
 
-def fetch(url: str) -> str:
-    logging.debug(f"Fetching '{url}'...")
+def http_connection(scheme: str, host: str) -> http.client.HTTPConnection:
+    """Return a persistent connection to the host, to reuse TCP and TLS sessions across requests"""
+
+    # Connections can't be shared between threads
+    key = (threading.get_ident(), scheme, host)
+
+    if (conn := HTTP_CONNECTIONS.get(key)) is None:
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = HTTP_CONNECTIONS[key] = conn_class(host, timeout=REQUEST_TIMEOUT)
+
+    return conn
+
+
+def http_close_connections() -> None:
+    """Close persistent connections of the current thread, e.g. before the thread exits"""
+
+    ident = threading.get_ident()
+
+    # Copy keys first, since other threads may add connections meanwhile
+    for key in [key for key in list(HTTP_CONNECTIONS) if key[0] == ident]:
+        HTTP_CONNECTIONS.pop(key).close()
+
+
+def http_get(conn: http.client.HTTPConnection, path: str) -> http.client.HTTPResponse:
+    headers = {"User-Agent": "retronews", "Accept-Encoding": "gzip"}
 
-    headers = {"User-Agent": "retronews"}
+    try:
+        conn.request("GET", path, headers=headers)
+        return conn.getresponse()
+    except (http.client.HTTPException, ConnectionError):
+        # Server could have closed an idle connection, retry once on a fresh one
+        conn.close()
+
+    try:
+        conn.request("GET", path, headers=headers)
+        return conn.getresponse()
+    except BaseException:
+        conn.close()
+        raise
+
+
+def http_uses_proxy(url: str) -> bool:
+    """Check if the url should be fetched through a proxy configured in the environment, e.g. HTTPS_PROXY"""
+
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.netloc)
+
+
+def fetch_bytes_proxied(url: str) -> bytes:
+    """Fetch the url with urllib, which handles proxies, but doesn't reuse connections"""
+
+    headers = {"User-Agent": "retronews", "Accept-Encoding": "gzip"}
     req = urllib.request.Request(url, headers=headers)
-    resp = urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT).read().decode()
 
-    return resp
+    with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
+        data = resp.read()
+        encoding = resp.headers.get("Content-Encoding")
+
+    return gzip.decompress(data) if encoding == "gzip" else data
+
+
+def fetch_bytes(url: str) -> bytes:
+    logging.debug(f"Fetching '{url}'...")
+
+    for _ in range(HTTP_MAX_REDIRECTS + 1):
+        # Persistent connections are always direct, so leave proxied requests to urllib
+        if http_uses_proxy(url):
+            return fetch_bytes_proxied(url)
+
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        conn = http_connection(parts.scheme, parts.netloc)
+
+        resp = http_get(conn, path)
+        data = resp.read()
+
+        if resp.status in (301, 302, 303, 307, 308) and (location := resp.getheader("Location")):
+            url = urllib.parse.urljoin(url, location)
+            logging.debug(f"Redirected to '{url}'...")
+            continue
+
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+
+        if resp.getheader("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+
+        return data
+
+    raise urllib.error.URLError(f"Too many redirects for '{url}'")
+
+
+def fetch(url: str) -> str:
+    return fetch_bytes(url).decode()
+
+
+def fetch_json(url: str) -> Any:
+    # JSON parsers accept bytes, so there's no need to decode the response first
+    return json_loads(fetch_bytes(url))
 
 
 @overload
@@ -702,12 +937,22 @@ def cmd_down(app: AppState) -> None:
 
 def cmd_prev(app: AppState) -> None:
     pos = app.selected_message.index_position - 1 if app.selected_message else 0
-    app_select_message(app, list_get(app.messages, pos, app.selected_message))
+
+    if (message := list_get(app.messages, pos, app.selected_message)) is app.selected_message:
+        # Already at the edge, reselecting would only scroll the pager back to the top
+        return app_scroll_pager(app, 0)
+
+    app_select_message(app, message)
 
 
 def cmd_next(app: AppState) -> None:
     pos = app.selected_message.index_position + 1 if app.selected_message else 0
-    app_select_message(app, list_get(app.messages, pos, app.selected_message))
+
+    if (message := list_get(app.messages, pos, app.selected_message)) is app.selected_message:
+        # Already at the edge, reselecting would only scroll the pager back to the top
+        return app_scroll_pager(app, 0)
+
+    app_select_message(app, message)
 
 
 def cmd_next_unread(app: AppState) -> None:
@@ -742,15 +987,20 @@ def cmd_prev_sibling(app: AppState) -> None:
 def cmd_mark_thread_as_read(app: AppState) -> None:
     # recursively mark us and all children as read
     # then jump to the next sibling
+    marked: list[Message] = []
+
     def iterate(message: Message):
         if message.children:
             for child in message.children:
                 child.flags.read = True
-                db_save_message(app.db, child)
+                marked.append(child)
                 iterate(child)
 
     if (msg := app.selected_message) is not None:
         iterate(msg)
+        db_save_messages(app.db, marked)
+        # marked rows need redrawing even if there's no sibling to jump to
+        app.dirty = True
         # jump to the next sibling
         cmd_next_sibling(app)
 
@@ -775,12 +1025,12 @@ def cmd_mark_jump(app: AppState) -> None:
 
 
 def cmd_pager_up(app: AppState) -> None:
-    app.pager_offset = max(0, app.pager_offset - 1)
+    app_scroll_pager(app, max(0, app.pager_offset - 1))
 
 
 def cmd_pager_down(app: AppState) -> None:
-    if app.selected_message is not None and app.layout.pager_height is not None:
-        app.pager_offset = min(app.pager_offset + 1, max(0, len(app.selected_message.lines) - app.layout.pager_height))
+    if (message := app.selected_message) is not None and (pager_height := app.layout.pager_height) is not None:
+        app_scroll_pager(app, min(app.pager_offset + 1, max(0, len(message.lines) - pager_height)))
 
 
 def cmd_page_up(app: AppState) -> None:
@@ -805,12 +1055,12 @@ def cmd_index_page_down(app: AppState) -> None:
 
 def cmd_pager_page_up(app: AppState) -> None:
     if app.layout.pager_height is not None:
-        app.pager_offset = max(0, app.pager_offset - app.layout.pager_height)
+        app_scroll_pager(app, max(0, app.pager_offset - app.layout.pager_height))
 
 
 def cmd_pager_page_down(app: AppState) -> None:
     if (message := app.selected_message) is not None and (pager_height := app.layout.pager_height) is not None:
-        app.pager_offset = min(app.pager_offset + pager_height, max(0, len(message.lines) - pager_height))
+        app_scroll_pager(app, min(app.pager_offset + pager_height, max(0, len(message.lines) - pager_height)))
 
 
 def cmd_load_tab(app: AppState, tab: int) -> None:
@@ -819,6 +1069,8 @@ def cmd_load_tab(app: AppState, tab: int) -> None:
 
 
 def cmd_reload_page(app: AppState) -> None:
+    # Reloading is meant to show fresh content, so don't reuse threads fetched in advance
+    app.prefetched_threads.clear()
     app_load_group(app, app.group)
 
 
@@ -852,6 +1104,7 @@ def cmd_open(app: AppState) -> None:
 def cmd_close(app: AppState) -> None:
     if app.pager_visible:
         app.pager_visible = False
+        app.dirty = True
     else:
         app_close_thread(app)
 
@@ -860,6 +1113,7 @@ def cmd_star(app: AppState) -> None:
     if (msg := app.selected_message) is not None:
         msg.flags.starred = not msg.flags.starred
         db_save_message(app.db, msg)
+        app.dirty = True
         cmd_next(app)
 
 
@@ -872,6 +1126,7 @@ def cmd_star_thread(app: AppState) -> None:
 
     thread_msg.flags.starred = not thread_msg.flags.starred
     db_save_message(app.db, thread_msg)
+    app.dirty = True
     cmd_next(app)
 
 
@@ -879,6 +1134,7 @@ def cmd_set_unread(app: AppState) -> None:
     if (msg := app.selected_message) is not None:
         msg.flags.read = False
         db_save_message(app.db, msg)
+        app.dirty = True
         cmd_next(app)
 
 
@@ -896,15 +1152,19 @@ def cmd_dump(app: AppState) -> None:
 
 def cmd_toggle_raw_mode(app: AppState) -> None:
     app.raw_mode = not app.raw_mode
+    app.pager_runs.clear()
     app_select_message(app, app.selected_message)
 
 
 def cmd_resize(app: AppState) -> None:
+    app.layout.lines = app.layout.cols = 0
+    app_invalidate_screen(app)
     app_refresh_message(app)
 
 
 def cmd_unknown(app: AppState) -> None:
     app.flash = "Unknown key"
+    app.dirty = True
 
 
 def db_init(path: str) -> DB:
@@ -921,46 +1181,72 @@ def db_init(path: str) -> DB:
             JSON_EXTRACT(flags, '$.starred'),
             date
         );
+
+        CREATE INDEX IF NOT EXISTS messages_thread_id_read ON messages (
+            thread_id,
+            JSON_EXTRACT(flags, '$.read')
+        );
+    """
+
+    # Flags are committed after every command, so avoid syncing the disk on each commit.
+    # In WAL mode with synchronous=NORMAL a crash may only lose the last few commits.
+    pragmas_sql = """
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA temp_store = MEMORY;
     """
 
     db = sqlite3.connect(path)
     db.row_factory = sqlite3.Row
+    db.executescript(pragmas_sql)
     db.executescript(create_table_sql)
     db.commit()
 
     return cast(DB, db)
 
 
-def db_save_message(db: DB, message: Message) -> None:
-    sql = """INSERT OR REPLACE INTO messages (msg_id, thread_id, date, flags) VALUES (?, ?, ?, ?)"""
+def db_message_row(message: Message) -> tuple[str, str, int, str]:
     date = int(message.date.timestamp())
-    flags_json = json.dumps(dataclasses.asdict(message.flags))
-    db.execute(sql, (message.msg_id, message.thread_id, date, flags_json))
-    db.commit()
+    # Flags have a fixed shape, so skip the generic asdict + json.dumps path
+    flags = message.flags
+    flags_json = '{"read": %s, "starred": %s}' % (
+        "true" if flags.read else "false",
+        "true" if flags.starred else "false",
+    )
+    return (message.msg_id, message.thread_id, date, flags_json)
+
+
+def db_save_messages(db: DB, messages: list[Message]) -> None:
+    sql = """INSERT OR REPLACE INTO messages (msg_id, thread_id, date, flags) VALUES (?, ?, ?, ?)"""
+    db.executemany(sql, (db_message_row(message) for message in messages))
+
+
+def db_save_message(db: DB, message: Message) -> None:
+    db_save_messages(db, [message])
 
 
 def db_load_message_flags(db: DB, messages_by_id: dict[str, Message]) -> None:
-    message_ids = list(messages_by_id.keys())
-    sql = f"SELECT * FROM messages WHERE msg_id IN ({','.join('?' for _ in message_ids)})"
+    # Pass ids as a single JSON array, so the statement text stays constant and can be
+    # reused from the statement cache regardless of the number of messages
+    sql = "SELECT msg_id, flags FROM messages WHERE msg_id IN (SELECT value FROM JSON_EACH(?))"
 
-    for row in db.execute(sql, message_ids):
-        flags = json.loads(row["flags"])
-        messages_by_id[row["msg_id"]].flags = MessageFlags(**flags)
+    # Unpack rows positionally, lookups by column name are slow in hot loops
+    for msg_id, flags_json in db.execute(sql, (json.dumps(list(messages_by_id)),)):
+        messages_by_id[msg_id].flags = MessageFlags(**json_loads(flags_json))
 
 
 def db_load_read_comments(db: DB, messages_by_id: dict[str, Message]) -> None:
     threads_by_id = {msg.msg_id: msg for msg in messages_by_id.values() if msg.is_thread}
-    thread_ids = list(threads_by_id.keys())
 
-    sql = f"""
+    sql = """
         SELECT thread_id, COUNT(*) AS count
         FROM messages
-        WHERE thread_id IN ({','.join('?' for _ in thread_ids)}) AND JSON_EXTRACT(flags, '$.read')
+        WHERE thread_id IN (SELECT value FROM JSON_EACH(?)) AND JSON_EXTRACT(flags, '$.read')
         GROUP BY thread_id
     """
 
-    for row in db.execute(sql, thread_ids):
-        threads_by_id[row["thread_id"]].read_comments = row["count"]
+    for thread_id, count in db.execute(sql, (json.dumps(list(threads_by_id)),)):
+        threads_by_id[thread_id].read_comments = count
 
 
 def db_load_starred_thread_ids(db: DB, page: int = 1) -> list[str]:
@@ -976,45 +1262,54 @@ def db_load_starred_thread_ids(db: DB, page: int = 1) -> list[str]:
         OFFSET ?
     """
 
-    return [row["thread_id"] for row in db.execute(sql, (page_size, offset))]
+    return [thread_id for (thread_id,) in db.execute(sql, (page_size, offset))]
 
 
-def msg_flatten_thread(
-    msg: Message, prefix: str = "", is_last_child: bool = False, ascii: bool = False
-) -> Generator[Message, None, None]:
+def msg_flatten_thread(root: Message, ascii: bool = False) -> list[Message]:
     blcorner = "'-" if ascii else "└─"
     ltee = "|-" if ascii else "├─"
     vline = "| " if ascii else "│ "
 
-    msg.index_tree = "" if msg.is_thread else f"{prefix}{blcorner if is_last_child else ltee}> "
-    yield msg
+    ret: list[Message] = []
+
+    # Iterative pre-order traversal, so deep threads don't hit the recursion limit
+    stack: list[tuple[Message, str, bool]] = [(root, "", False)]
+
+    while stack:
+        msg, prefix, is_last_child = stack.pop()
+
+        msg.index_tree = "" if msg.is_thread else f"{prefix}{blcorner if is_last_child else ltee}> "
+        ret.append(msg)
 
-    children = msg.children or []
+        children = msg.children or []
+        child_prefix = "" if msg.is_thread else f"{prefix}{'  ' if is_last_child else vline}"
+        last_idx = len(children) - 1
 
-    child_count = len(children)
-    child_prefix = "" if msg.is_thread else f"{prefix}{'  ' if is_last_child else vline}"
+        # Push in reverse to pop children in their original order
+        for i in range(last_idx, -1, -1):
+            stack.append((children[i], child_prefix, i == last_idx))
 
-    for i, child_node in enumerate(children):
-        child_is_last = i == child_count - 1
-        for child in msg_flatten_thread(child_node, prefix=child_prefix, is_last_child=child_is_last, ascii=ascii):
-            yield child
+    return ret
 
 
 def msg_build_raw_lines(msg: Message) -> list[str]:
     text = text_sanitize(msg.body)
 
-    # Unescape selected entities for better readability
-    repl = {"&#x2F;": "/", "&#x27;": "'", "&quot;": '"'}
-    for k, v in repl.items():
-        text = text.replace(k, v)
+    # Unescape selected entities for better readability, in a single pass
+    text = RAW_ENTITY_REX.sub(lambda m: RAW_ENTITIES[m.group(0)], text)
+
+    lines: list[str] = []
 
-    return reduce(lambda acc, line: acc + wrap(line, width=120, replace_whitespace=False), text.split("\n"), [])
+    for line in text.split("\n"):
+        lines.extend(wrap(line, width=120, replace_whitespace=False))
+
+    return lines
 
 
 def msg_build_lines(msg: Message) -> list[str]:
     lines = [
         f"Content-Location: {msg.content_location}",
-        f"Date: {msg.date.strftime('%Y-%m-%d %H:%M')}",
+        f"Date: {msg.date_str}",
         f"From: {msg.author or '<unknown>'}",
         f"Subject: {msg.title}",
         "",
@@ -1025,9 +1320,23 @@ def msg_build_lines(msg: Message) -> list[str]:
     return lines
 
 
+def msg_get_lines(msg: Message, raw: bool = False) -> list[str]:
+    """Return message lines, building them only on first use"""
+
+    if raw:
+        if msg.raw_lines is None:
+            msg.raw_lines = msg_build_raw_lines(msg)
+        return msg.raw_lines
+
+    if msg.rendered_lines is None:
+        msg.rendered_lines = msg_build_lines(msg)
+    return msg.rendered_lines
+
+
 def msg_unload(msg: Message) -> Message:
     msg.children = None
     msg.body = None
+    msg.rendered_lines = msg.raw_lines = None
     return msg
 
 
@@ -1045,35 +1354,49 @@ def hn_parse_search_hit(hit: HNSearchHit) -> Message:
 
 def hn_parse_entry(entry: HNEntry, thread_id: str = "", parent: Optional[Message] = None) -> Message:
     thread_id = thread_id or str(entry["id"])
+    root: Optional[Message] = None
 
-    my_title = html.unescape(entry["title"]) if entry["title"] else None
+    # Iterative pre-order traversal, so deep threads don't hit the recursion limit
+    stack: list[tuple[HNEntry, Optional[Message]]] = [(entry, parent)]
 
-    parent_title = parent.title if parent else ""
-    parent_title = parent_title if parent_title.startswith("Re: ") else f"Re: {parent_title}"
+    while stack:
+        entry, parent = stack.pop()
 
-    body = f"<p>{entry['url']}</p>" if entry["url"] else ""
-    body = f"{body}{entry['text']}" if entry["text"] else body
+        my_title = html.unescape(entry["title"]) if entry["title"] else None
 
-    msg = Message(
-        msg_id=f"{entry['id']}@hn",
-        thread_id=f"{thread_id}@hn",
-        content_location=f"https://news.ycombinator.com/item?id={entry['id']}",
-        date=datetime.fromtimestamp(entry["created_at_i"]),
-        author=entry["author"],
-        title=my_title or parent_title,
-        body=body,
-        parent=parent,
-    )
+        parent_title = parent.title if parent else ""
+        parent_title = parent_title if parent_title.startswith("Re: ") else f"Re: {parent_title}"
 
-    msg.children = [hn_parse_entry(child, thread_id, msg) for child in entry["children"]]
+        body = f"<p>{entry['url']}</p>" if entry["url"] else ""
+        body = f"{body}{entry['text']}" if entry["text"] else body
 
-    return msg
+        msg = Message(
+            msg_id=f"{entry['id']}@hn",
+            thread_id=f"{thread_id}@hn",
+            content_location=f"https://news.ycombinator.com/item?id={entry['id']}",
+            date=datetime.fromtimestamp(entry["created_at_i"]),
+            author=entry["author"],
+            title=my_title or parent_title,
+            body=body,
+            parent=parent,
+            children=[],
+        )
+
+        if root is None:
+            root = msg
+        elif parent is not None and parent.children is not None:
+            parent.children.append(msg)
+
+        # Push in reverse to pop children in their original order
+        stack.extend((child, msg) for child in reversed(entry["children"]))
+
+    return cast(Message, root)
 
 
 def hn_fetch_threads_by_id(thread_ids: list[str]) -> list[Message]:
     story_tags = ",".join(f"story_{x}" for x in thread_ids)
     url = f"https://hn.algolia.com/api/v1/search_by_date?hitsPerPage={len(thread_ids)}&tags=story,({story_tags})"
-    hits = json.loads(fetch(url))["hits"]
+    hits = fetch_json(url)["hits"]
     hits_by_id = {hit["objectID"]: hit for hit in hits}
     threads = [hn_parse_search_hit(hits_by_id[tid]) for tid in thread_ids if tid in hits_by_id]
 
@@ -1081,25 +1404,81 @@ def hn_fetch_threads_by_id(thread_ids: list[str]) -> list[Message]:
 
 
 def hn_fetch_threads(group: str = "news", page: int = 1) -> list[Message]:
-    rex = re.compile(r'href="item\?id=(\d+)"')
-
     html = fetch(f"https://news.ycombinator.com/{group}?p={page}")
-    thread_ids = list(dict.fromkeys(match.group(1) for match in rex.finditer(html)))
+    thread_ids = list(dict.fromkeys(match.group(1) for match in HN_ITEM_HREF_REX.finditer(html)))
 
     return hn_fetch_threads_by_id(thread_ids)
 
 
 def hn_fetch_new_threads(page: int = 1) -> list[Message]:
     url = f"https://hn.algolia.com/api/v1/search_by_date?tags=story&hitsPerPage=30&page={page}"
-    hits = json.loads(fetch(url))["hits"]
+    hits = fetch_json(url)["hits"]
 
     return [hn_parse_search_hit(hit) for hit in hits]
 
 
+def hn_fetch_entry(entry_id: Union[str, int]) -> HNEntry:
+    url = f"https://hn.algolia.com/api/v1/items/{entry_id}"
+
+    if HN_CACHE_DIR is None:
+        return fetch_json(url)
+
+    cache_dir = os.path.expanduser(HN_CACHE_DIR)
+    path = os.path.join(cache_dir, f"{entry_id}.json")
+
+    try:
+        if time.time() - os.path.getmtime(path) < HN_CACHE_TTL:
+            with open(path, "rb") as fp:
+                return json_loads(fp.read())
+    except (OSError, ValueError):
+        pass
+
+    data = fetch_bytes(url)
+    entry = json_loads(data)
+
+    # Write to a unique temporary file first, so concurrent fetches never see partial files
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Failed to cache {url}: {e}")
+
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    return entry
+
+
+def hn_prune_cache() -> None:
+    """Remove expired cache files, including temporary ones left behind by interrupted writes"""
+
+    if HN_CACHE_DIR is None:
+        return
+
+    now = time.time()
+
+    try:
+        entries = list(os.scandir(os.path.expanduser(HN_CACHE_DIR)))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if entry.is_file() and now - entry.stat().st_mtime >= HN_CACHE_TTL:
+                os.unlink(entry.path)
+        except OSError:
+            # Could have been removed by another instance meanwhile
+            pass
+
+
 def hn_fetch_thread(entry_id: Union[str, int]) -> Message:
-    resp = fetch(f"http://hn.algolia.com/api/v1/items/{entry_id}")
-    entry: HNEntry = json.loads(resp)
-    return hn_parse_entry(entry)
+    return hn_parse_entry(hn_fetch_entry(entry_id))
 
 
 def lb_parse_thread(thread: LBThread) -> Message:
@@ -1120,8 +1499,11 @@ def lb_parse_thread(thread: LBThread) -> Message:
         total_comments=thread["comment_count"] + 1,
     )
 
+    # Parents may come after their replies, so link them only once all comments are created
+    pending: list[tuple[Message, Optional[str]]] = []
+
     for comment in thread.get("comments", []) or []:
-        comments[comment["short_id"]] = Message(
+        msg = comments[comment["short_id"]] = Message(
             msg_id=f"{comment['short_id']}@lb",
             thread_id=f"{thread['short_id']}@lb",
             content_location=comment["url"],
@@ -1131,10 +1513,10 @@ def lb_parse_thread(thread: LBThread) -> Message:
             body=comment["comment"],
             children=[],
         )
+        pending.append((msg, comment["parent_comment"]))
 
-    for comment in thread.get("comments", []) or []:
-        msg = comments[comment["short_id"]]
-        parent_msg = comments[comment["parent_comment"]] if comment["parent_comment"] else ret
+    for msg, parent_id in pending:
+        parent_msg = comments[parent_id] if parent_id else ret
         msg.parent = parent_msg
         if parent_msg.children is not None:
             parent_msg.children.append(msg)
@@ -1144,19 +1526,22 @@ def lb_parse_thread(thread: LBThread) -> Message:
 
 def lb_fetch_threads(group: str = "", page: int = 1) -> list[Message]:
     group_path = f"{group}/" if group else ""
-    resp = fetch(f"https://lobste.rs/{group_path}page/{page}.json")
-    threads: list[LBThread] = json.loads(resp)
+    threads: list[LBThread] = fetch_json(f"https://lobste.rs/{group_path}page/{page}.json")
 
     return [lb_parse_thread(thread) for thread in threads]
 
 
 def lb_fetch_thread(entry_id: str) -> Message:
-    resp = fetch(f"https://lobste.rs/s/{entry_id}.json")
-    thread: LBThread = json.loads(resp)
+    thread: LBThread = fetch_json(f"https://lobste.rs/s/{entry_id}.json")
 
     return lb_parse_thread(thread)
 
 
+def lb_fetch_threads_by_id(thread_ids: list[str]) -> list[Message]:
+    # There's no endpoint for fetching multiple threads, so at least don't wait for them one after another
+    return list(FETCH_EXECUTOR.map(lb_fetch_thread, thread_ids))
+
+
 def group_set_page(group: Group, page: int) -> Group:
     return dataclasses.replace(group, page=page)
 
@@ -1173,9 +1558,19 @@ def group_fetch_starred_threads(db: DB, page: int = 1) -> list[Message]:
     for source_id, provider_id in (t.split("@") for t in thread_ids):
         threads_by_provider_id.setdefault(provider_id, list()).append(source_id)
 
-    for provider_id, thread_ids in threads_by_provider_id.items():
-        provider = PROVIDERS[provider_id]
-        threads += provider.fetch_threads_by_id(thread_ids)
+    def fetch_provider_threads(item: tuple[str, list[str]]) -> list[Message]:
+        (provider_id, thread_ids) = item
+
+        try:
+            return PROVIDERS[provider_id].fetch_threads_by_id(thread_ids)
+        finally:
+            # Workers only live for this call, so don't leave their connections behind
+            http_close_connections()
+
+    # Providers are independent, so don't let a slow one hold up the others
+    with ThreadPoolExecutor(max_workers=max(len(threads_by_provider_id), 1)) as executor:
+        for provider_threads in executor.map(fetch_provider_threads, threads_by_provider_id.items()):
+            threads += provider_threads
 
     threads.sort(key=lambda x: x.date, reverse=True)
 
@@ -1218,25 +1613,30 @@ def app_safe_run(app: AppState, fn: Callable[[], T], flash: Optional[str]) -> Op
 
 def app_refresh_message(app: AppState) -> None:
     app.pager_offset = 0
+    app.dirty = True
+
+    # Converting html to lines lazily, only once the message is actually shown
+    if (msg := app.selected_message) is not None and app.pager_visible:
+        msg.lines = msg_get_lines(msg, raw=app.raw_mode)
 
-    # Converting html to lines lazily on render for easier debugging
-    if (msg := app.selected_message) is not None:
-        msg.lines = msg_build_raw_lines(msg) if app.raw_mode else msg_build_lines(msg)
+
+def app_scroll_pager(app: AppState, offset: int) -> None:
+    if offset != app.pager_offset:
+        app.pager_offset = offset
+        app.dirty = True
 
 
 def app_select_message(app: AppState, message: Optional[Message], show_pager: bool = False) -> None:
     app.selected_message = message
 
-    app_refresh_message(app)
-
     if message is None or message.body is None:
         app.pager_visible = False
-        return
-
-    if show_pager:
+    elif show_pager:
         app.pager_visible = True
 
-    if app.pager_visible:
+    app_refresh_message(app)
+
+    if message is not None and app.pager_visible:
         message.flags.read = True
         db_save_message(app.db, message)
         db_load_read_comments(app.db, {message.thread_id: app.messages_by_id[message.thread_id]})
@@ -1248,21 +1648,28 @@ def app_load_messages(
     if selected_message_id is None and app.selected_message is not None:
         selected_message_id = app.selected_message.msg_id
 
-    selected_message = None
+    messages_by_id = {}
+    new_messages_by_id = {}
 
     for i, message in enumerate(messages):
         message.index_position = i
+        messages_by_id[message.msg_id] = message
 
-        if message.msg_id == selected_message_id:
-            selected_message = message
+        if app.messages_by_id.get(message.msg_id) is not message:
+            new_messages_by_id[message.msg_id] = message
+
+    selected_message = messages_by_id.get(selected_message_id) if selected_message_id is not None else None
 
     if selected_message is None and len(messages) > 0:
         selected_message = messages[0]
 
     app.messages = messages
-    app.messages_by_id = {msg.msg_id: msg for msg in messages}
+    app.messages_by_id = messages_by_id
+
+    # Flags of messages that were already loaded are kept up to date in memory
+    if new_messages_by_id:
+        db_load_message_flags(app.db, new_messages_by_id)
 
-    db_load_message_flags(app.db, app.messages_by_id)
     db_load_read_comments(app.db, app.messages_by_id)
 
     app_select_message(app, selected_message, show_pager)
@@ -1286,8 +1693,26 @@ def app_close_thread(app: AppState) -> None:
     app_load_messages(app, filtered_messages, selected_message_id=selected_thread_id)
 
 
+def app_prefetch_thread(app: AppState, thread_message: Optional[Message]) -> None:
+    """Start fetching the thread in the background, keeping at most one prefetched thread"""
+
+    if thread_message is None or not thread_message.is_thread:
+        return
+
+    if thread_message.thread_id not in app.prefetched_threads:
+        app.prefetched_threads.clear()
+        future = PREFETCH_EXECUTOR.submit(group_fetch_thread, thread_message.thread_id)
+        app.prefetched_threads[thread_message.thread_id] = (time.monotonic(), future)
+
+
 def app_open_thread(app: AppState, thread_message: Message) -> None:
-    fn = partial(group_fetch_thread, thread_message.thread_id)
+    prefetched = app.prefetched_threads.pop(thread_message.thread_id, None)
+
+    if prefetched is not None and time.monotonic() - prefetched[0] < PREFETCH_TTL:
+        fn: Callable[[], Message] = prefetched[1].result
+    else:
+        fn = partial(group_fetch_thread, thread_message.thread_id)
+
     flash = f"Fetching thread '{thread_message.thread_id}'..."
 
     if (new_thread_message := app_safe_run(app, fn, flash=flash)) is None:
@@ -1296,17 +1721,23 @@ def app_open_thread(app: AppState, thread_message: Message) -> None:
     app_close_thread(app)
 
     index_pos = thread_message.index_position
-    thread_messages = list(msg_flatten_thread(new_thread_message, ascii=app.ascii))
+    thread_messages = msg_flatten_thread(new_thread_message, ascii=app.ascii)
     new_thread_message.total_comments = len(thread_messages)
-    messages = app.messages[:index_pos] + thread_messages + app.messages[index_pos + 1 :]  # noqa: E203
+    messages = list(app.messages)
+    messages[index_pos : index_pos + 1] = thread_messages  # noqa: E203
 
     app_load_messages(app, messages, selected_message_id=thread_message.msg_id, show_pager=True)
 
+    # Users tend to read threads in order, so have the next one ready in advance
+    app_prefetch_thread(app, list_get(app.messages, index_pos + len(thread_messages)))
+
 
 def app_update_layout(app: AppState) -> None:
     lt = app.layout
 
-    (lt.lines, lt.cols) = app.screen.getmaxyx()
+    # Screen size only changes on resize, which resets it to 0
+    if lt.lines == 0:
+        (lt.lines, lt.cols) = app.screen.getmaxyx()
 
     if lt.lines < 12 or lt.cols < 80:
         raise ExitException(1, "At least 80x12 terminal is required")
@@ -1322,12 +1753,22 @@ def app_update_layout(app: AppState) -> None:
     lt.flash_menu_row = lt.lines - 1
 
 
+def app_invalidate_screen(app: AppState) -> None:
+    """Make the next render redraw everything, e.g. after drawing over the whole screen"""
+
+    app.index_rows.clear()
+    app.pager_drawn = None
+    app.menus_drawn.clear()
+
+
 def app_show_help_screen(app: AppState) -> None:
     max_lines = app.layout.lines - 4
 
     help_lines = HELP_SCREEN.split("\n")
     help_pages = ["\n".join(lines) for lines in list_chunk(help_lines, max_lines)]
 
+    app_invalidate_screen(app)
+
     for page in help_pages:
         app.screen.erase()
         app.screen.addstr(0, 0, "Available commands:\n\n")
@@ -1336,9 +1777,12 @@ def app_show_help_screen(app: AppState) -> None:
         app.screen.refresh()
         app.screen.getch()
 
+    app.dirty = True
+
 
 def app_show_links_screen(app: AppState) -> None:
-    lines = app.selected_message.lines if app.selected_message is not None else []
+    msg = app.selected_message
+    lines = msg_get_lines(msg, raw=app.raw_mode) if msg is not None else []
 
     # Max amount of keys is 21 to fit on 25-line terminals
     keys = "1234567890abcdefghijk"
@@ -1348,8 +1792,10 @@ def app_show_links_screen(app: AppState) -> None:
     if len(items) == 0:
         return app_show_flash(app, "No links available for opening")
 
+    app_invalidate_screen(app)
     app.screen.erase()
     app.screen.addstr(0, 0, "Select link to open:")
+    app.dirty = True
 
     for i, (key, url) in enumerate(items.items()):
         app.screen.addstr(i + 2, 0, f"{chr(key)} - {url}")
@@ -1369,11 +1815,19 @@ def app_show_links_screen(app: AppState) -> None:
 
     # Refresh window in case a terminal browser was used
     app.screen.clearok(True)
+    app.dirty = True
 
 
 def app_show_flash(app: AppState, flash: Optional[str]) -> None:
     app.flash = flash
-    app_render(app)
+
+    if app.dirty:
+        return app_render(app)
+
+    # Nothing else changed since the last render, e.g. when showing progress of a fetch
+    app_render_flash(app)
+    app.screen.noutrefresh()
+    curses.doupdate()
 
 
 def app_prompt(app: AppState, prompt: str) -> str:
@@ -1381,6 +1835,7 @@ def app_prompt(app: AppState, prompt: str) -> str:
 
     app.screen.insstr(lt.flash_menu_row, 0, prompt.ljust(lt.cols))
     app.screen.refresh()
+    app.dirty = True
 
     curses.curs_set(1)
     win = curses.newwin(1, lt.cols - len(prompt), lt.flash_menu_row, len(prompt))
@@ -1397,19 +1852,31 @@ def app_prompt(app: AppState, prompt: str) -> str:
 
 def app_render_index_row(app: AppState, row: int, message: Message) -> None:
     cols = app.layout.cols
-    date = message.date.strftime("%Y-%m-%d %H:%M")
-    author = (message.author or "<unknown>")[:10].ljust(10)
 
     is_response = message.title.startswith("Re:") and not message.is_thread
-    is_selected = message == app.selected_message
+    is_selected = message is app.selected_message
     hide_title = is_response and row > app.layout.index_start and not message.flags.starred and not is_selected
-    title = "" if hide_title else text_clean(message.title, ascii=app.ascii)
+    unread = max(min(message.total_comments - message.read_comments, 9999), 0) if message.is_thread else None
 
-    unread = (
-        str(max(min(message.total_comments - message.read_comments, 9999), 0)).rjust(4) if message.is_thread else "    "
-    )
+    # Rebuild the row text only if any of its variable parts changed since the last render
+    if message.index_row_key != (row_key := (unread, message.index_tree, hide_title)):
+        title = "" if hide_title else text_clean(message.title, ascii=app.ascii)
+        unread_str = str(unread).rjust(4) if unread is not None else "    "
+        message.index_row = f"[{message.date_str}]  [{message.author_str}]  [{unread_str}]  {message.index_tree}{title}"
+        message.index_row_key = row_key
+
+    # Skip the row entirely if it's still drawn exactly as it would be now
+    drawn_key = (row_key, is_selected, message.is_shown_as_read, message.flags.starred)
+    drawn = app.index_rows[row - app.layout.index_start]
+
+    if drawn is not None and drawn[0] is message and drawn[1] == drawn_key:
+        return
 
-    app.screen.insstr(row, 0, f"[{date}]  [{author}]  [{unread}]  {message.index_tree}{title}")
+    app.index_rows[row - app.layout.index_start] = (message, drawn_key)
+
+    app.screen.move(row, 0)
+    app.screen.clrtoeol()
+    app.screen.insstr(row, 0, message.index_row)
 
     if is_selected:
         cursor_attr = curses.A_REVERSE if app.monochrome else 0
@@ -1426,6 +1893,16 @@ def app_render_index_row(app: AppState, row: int, message: Message) -> None:
         app.screen.chgat(row, 42 + len(message.index_tree), cols - 42 - len(message.index_tree), subject_attr)
 
 
+def app_scroll_rows(app: AppState, start: int, height: int, shift: int) -> None:
+    """Scroll given rows of the screen by shift lines, leaving blank rows behind"""
+
+    app.screen.setscrreg(start, start + height - 1)
+    app.screen.scrollok(True)
+    app.screen.scroll(shift)
+    app.screen.scrollok(False)
+    app.screen.setscrreg(0, app.layout.lines - 1)
+
+
 def app_render_index(app: AppState) -> None:
     height = app.layout.index_height
 
@@ -1434,48 +1911,70 @@ def app_render_index(app: AppState) -> None:
     offset = max(offset, 0)
 
     rows_to_render = min(height, len(app.messages) - offset)
+    (shift, app.index_offset) = (offset - app.index_offset, offset)
+
+    # Rows are only redrawn when they change, so start from scratch if the index was resized
+    if len(app.index_rows) != height:
+        app.index_rows = [None] * height
+
+        for i in range(height):
+            app.screen.move(app.layout.index_start + i, 0)
+            app.screen.clrtoeol()
+    elif 0 < abs(shift) < height:
+        # Index follows the cursor, so scroll rows that are still visible instead of redrawing them
+        app_scroll_rows(app, app.layout.index_start, height, shift)
 
-    for i in range(rows_to_render):
-        app_render_index_row(app, app.layout.index_start + i, app.messages[i + offset])
+        blank_rows: list[Optional[tuple[Message, tuple[Any, ...]]]] = [None] * abs(shift)
+        app.index_rows = app.index_rows[shift:] + blank_rows if shift > 0 else blank_rows + app.index_rows[:shift]
+
+    for i, message in enumerate(app.messages[offset : offset + rows_to_render]):  # noqa: E203
+        app_render_index_row(app, app.layout.index_start + i, message)
+
+    for i in range(rows_to_render, height):
+        if app.index_rows[i] is not None:
+            app.screen.move(app.layout.index_start + i, 0)
+            app.screen.clrtoeol()
+            app.index_rows[i] = None
 
 
 def app_get_pager_line_attr(app: AppState, line: str) -> int:
-    if line.startswith("Content-Location: "):
-        return app.colors["tree"]
-    elif line.startswith("Date: "):
-        return app.colors["date"]
-    elif line.startswith("From: "):
-        return app.colors["author"]
-    elif line.startswith("Subject: "):
-        return app.colors["header_subject"]
-    elif line.startswith(">>") or line.startswith("> >"):
-        return app.colors["nested_quote"]
-    elif line.startswith(">"):
+    # Dispatch on the first two characters, to check at most a couple of prefixes per line
+    for prefix, color in PAGER_PREFIX_COLORS.get(line[:2], ()):
+        if line.startswith(prefix):
+            return app.colors[color]
+
+    if line.startswith(">"):
         return app.colors["quote"]
-    elif line.startswith("| "):
-        return app.colors["code"]
-    elif line == "~":
-        return app.colors["empty_pager_line"]
-    elif line == "<deleted>" or line == "[dead]":
-        return app.colors["deleted_message_pager_line"]
-    else:
-        return 0
 
+    if (line_color := PAGER_LINE_COLORS.get(line)) is not None:
+        return app.colors[line_color]
+
+    return 0
+
+
+def app_build_pager_line_runs(app: AppState, line: str) -> list[tuple[str, int]]:
+    """Split pager line into (text, attr) runs ready for drawing"""
 
-def app_render_pager_line(app: AppState, row: int, line: str) -> None:
     hl_lines = not app.raw_mode
     line_attr = app_get_pager_line_attr(app, line) if hl_lines else 0
     hl_urls = line_attr == 0 and hl_lines
 
     line = text_clean(line, ascii=app.ascii)
 
+    return [(part, app.colors["url"] if is_url and hl_urls else line_attr) for part, is_url in text_split_urls(line)]
+
+
+def app_render_pager_line(app: AppState, row: int, line: str) -> None:
+    if (runs := app.pager_runs.get(line)) is None:
+        if len(app.pager_runs) >= PAGER_RUNS_CACHE_SIZE:
+            app.pager_runs.clear()
+        runs = app.pager_runs[line] = app_build_pager_line_runs(app, line)
+
     app.screen.move(row, 0)
     app.screen.clrtoeol()
     app.screen.move(row, 0)
 
-    for part in text_split_urls(line):
-        is_url = URL_REX.fullmatch(part)
-        part_attr = app.colors["url"] if is_url and hl_urls else line_attr
+    for part, part_attr in runs:
         app.screen.addstr(part, part_attr)
 
 
@@ -1485,29 +1984,65 @@ def app_render_pager(app: AppState) -> None:
     height = app.layout.pager_height
 
     if message is None or start is None or height is None:
+        app.pager_drawn = None
+        return
+
+    offset = app.pager_offset
+    rows_to_render = range(height)
+
+    if app.pager_drawn is not None:
+        (drawn_message, drawn_lines, drawn_offset, drawn_start, drawn_height) = app.pager_drawn
+
+        if drawn_message is message and drawn_lines is message.lines and (drawn_start, drawn_height) == (start, height):
+            shift = offset - drawn_offset
+
+            if shift == 0:
+                # Skip redrawing if only the index changed, e.g. after starring a message
+                return
+
+            if abs(shift) < height:
+                # Scroll lines that stay visible and only draw the ones scrolled in
+                app_scroll_rows(app, start, height, shift)
+                rows_to_render = range(height - shift, height) if shift > 0 else range(-shift)
+
+    app.pager_drawn = (message, message.lines, offset, start, height)
+
+    lines = message.lines
+
+    for i in rows_to_render:
+        app_render_pager_line(app, i + start, lines[offset + i] if offset + i < len(lines) else "~")
+
+
+def app_render_menu_text(app: AppState, name: str, row: int, text: str, attr: int) -> None:
+    """Draw menu text over the whole row, unless it's already drawn there"""
+
+    if app.menus_drawn.get(name) == (row, text, attr):
         return
 
-    for i in range(height):
-        line = list_get(message.lines, i + app.pager_offset, "~")
-        app_render_pager_line(app, i + start, line)
+    app.menus_drawn[name] = (row, text, attr)
+
+    app.screen.move(row, 0)
+    app.screen.clrtoeol()
+    app.screen.insstr(row, 0, text, attr)
 
 
 def app_render_top_menu(app: AppState) -> None:
     lt = app.layout
     cols = lt.cols
     base_attr = curses.A_REVERSE if app.monochrome else curses.A_BOLD
-    app.screen.insstr(lt.top_menu_row, 0, HELP_MENU[:cols].ljust(cols), app.colors["menu"] | base_attr)
+    app_render_menu_text(app, "top", lt.top_menu_row, HELP_MENU[:cols].ljust(cols), app.colors["menu"] | base_attr)
 
 
 def app_render_middle_menu(app: AppState) -> None:
     if (row := app.layout.middle_menu_row) is None:
+        app.menus_drawn.pop("middle", None)
         return
 
     if (message := app.selected_message) is None:
-        return
+        return app_render_menu_text(app, "middle", row, "", 0)
 
     if (thread_message := app.messages_by_id.get(message.thread_id)) is None:
-        return
+        return app_render_menu_text(app, "middle", row, "", 0)
 
     cols = app.layout.cols
     total = thread_message.total_comments
@@ -1521,13 +2056,23 @@ def app_render_middle_menu(app: AppState) -> None:
     text = text[:cols].ljust(cols, "-")
 
     base_attr = curses.A_REVERSE if app.monochrome else curses.A_BOLD
-    app.screen.insstr(row, 0, text, app.colors["menu"] | base_attr)
+    app_render_menu_text(app, "middle", row, text, app.colors["menu"] | base_attr)
 
 
 def app_render_bottom_menu(app: AppState) -> None:
     lt = app.layout
     base_attr = curses.A_REVERSE if app.monochrome else curses.A_BOLD
 
+    # Tabs only change when switching groups or pages
+    drawn_key = (lt.bottom_menu_row, lt.cols, app.group.label, app.group.page, base_attr, app.colors["menu"])
+
+    if app.menus_drawn.get("bottom") == drawn_key:
+        return
+
+    app.menus_drawn["bottom"] = drawn_key
+
+    app.screen.move(lt.bottom_menu_row, 0)
+    app.screen.clrtoeol()
     app.screen.chgat(lt.bottom_menu_row, 0, lt.cols, app.colors["menu"] | base_attr)
     app.screen.move(lt.bottom_menu_row, 0)
 
@@ -1542,16 +2087,26 @@ def app_render_bottom_menu(app: AppState) -> None:
     app.screen.insstr(lt.bottom_menu_row, lt.cols - len(page_text), page_text, app.colors["menu"] | base_attr)
 
 
+def app_render_flash(app: AppState) -> None:
+    app.screen.move(app.layout.flash_menu_row, 0)
+    app.screen.clrtoeol()
+    app.screen.insstr(app.layout.flash_menu_row, 0, app.flash or "")
+
+
 def app_render(app: AppState) -> None:
     app_update_layout(app)
-    app.screen.erase()
+
+    # Rows are cleared only when redrawn, see app_render_index(), app_render_pager(), etc.
+
     app_render_index(app)
     app_render_pager(app)
     app_render_top_menu(app)
     app_render_middle_menu(app)
     app_render_bottom_menu(app)
-    app.screen.insstr(app.layout.flash_menu_row, 0, app.flash or "")
-    app.screen.refresh()
+    app_render_flash(app)
+    app.screen.noutrefresh()
+    curses.doupdate()
+    app.dirty = False
 
 
 def app_init_colors(app: AppState) -> None:
@@ -1572,16 +2127,38 @@ def app_init_colors(app: AppState) -> None:
 def app_main(screen: Window, db: DB, group: Group, ascii: bool, monochrome: bool) -> int:
     curses.curs_set(0)
 
+    # The cursor is hidden, so don't bother moving it back after each update
+    screen.leaveok(True)
+
     app = AppState(screen=screen, db=db, group=group, ascii=ascii, monochrome=monochrome)
 
     app_init_colors(app)
     app_load_group(app, app.group)
 
     while True:
-        app_render(app)
-        app.flash = ""
+        # Skip rendering if the last command didn't change anything
+        if app.dirty:
+            app_render(app)
+
         c = app.screen.getch()
-        KEY_BINDINGS.get(c, cmd_unknown)(app)
+
+        # Run all keys already waiting in the input, so held or pasted keys render once per batch
+        while c != -1:
+            # Flash is only shown until the next key press
+            if app.flash:
+                app.flash = ""
+                app.dirty = True
+
+            KEY_BINDINGS.get(c, cmd_unknown)(app)
+
+            # Commands may wait for a key themselves, so poll only in between them
+            app.screen.nodelay(True)
+            c = app.screen.getch()
+            app.screen.nodelay(False)
+
+        # Commit all changes made by the commands at once
+        if app.db.in_transaction:
+            app.db.commit()
 
 
 def setup_logging(path: Optional[str]) -> None:
@@ -1618,10 +2195,15 @@ if __name__ == "__main__":
     ap.add_argument("-t", "--tab", metavar="TAB", type=int, default=1, choices=tab_choices, help="initial tab")
     ap.add_argument("-r", "--render", metavar="PATH", default=None, help="render raw html message and quit")
     ap.add_argument("-m", "--msg", metavar="URL", default=None, help="render message from URL")
+    ap.add_argument("--cache", action="store_true", help="cache fetched HN threads on disk for a few minutes")
     args = ap.parse_args()
 
+    if args.cache:
+        HN_CACHE_DIR = os.path.join(CACHE_HOME, "retronews", "hn")
+
     setup_logging(args.logfile)
     run_rcfile(args.rcfile)
+    hn_prune_cache()
 
     if (path := args.render) is not None:
         with open(path) as fp:
@@ -1648,5 +2230,14 @@ if __name__ == "__main__":
         sys.stderr.write("\n".join(traceback.format_exception(e)))
         ret = 1
     finally:
+        # Changes made by the last command aren't committed yet if it was quitting
+        db.commit()
         db.close()
-        sys.exit(ret)
+
+        # Don't wait for background fetches, which nothing is going to use anymore. Running workers
+        # are joined at exit even after shutdown(wait=False), so skip the interpreter cleanup as well.
+        PREFETCH_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        logging.shutdown()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(ret)
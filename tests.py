@@ -1,6 +1,11 @@
+import difflib
 import os
-import subprocess
+import re
+import tempfile
+import time
 import unittest
+from datetime import datetime
+from unittest import mock
 
 import retronews
 
@@ -24,12 +29,321 @@ class TestHtmlRender(unittest.TestCase):
                 fp.write(actual)
             return
 
-        cmd = ["diff", "-Nru", "--color=always", out_path, "-"]
-        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
-        stdout, stderr = proc.communicate(input=actual)
+        with open(out_path) as fp:
+            expected = fp.read()
 
-        if proc.returncode != 0:
-            self.fail(f"Unexpected rendering output\n{stdout}")
+        diff = difflib.unified_diff(
+            expected.splitlines(keepends=True),
+            actual.splitlines(keepends=True),
+            fromfile=out_path,
+            tofile="-",
+        )
+
+        if diff_text := "".join(diff):
+            self.fail(f"Unexpected rendering output\n{diff_text}")
+
+
+class TestHNCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_dir = tmp_dir.name
+        self.urls = []
+
+        def fetch_bytes(url: str) -> bytes:
+            self.urls.append(url)
+            return b'{"id": 1, "title": "fetch %d"}' % len(self.urls)
+
+        for name, value in [("fetch_bytes", fetch_bytes), ("HN_CACHE_DIR", self.cache_dir)]:
+            patcher = mock.patch.object(retronews, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def makeOld(self, path: str):
+        mtime = time.time() - retronews.HN_CACHE_TTL - 1
+        os.utime(path, (mtime, mtime))
+
+    def test_hit(self):
+        self.assertEqual(retronews.hn_fetch_entry(1)["title"], "fetch 1")
+        self.assertEqual(retronews.hn_fetch_entry(1)["title"], "fetch 1")
+        self.assertEqual(len(self.urls), 1)
+        self.assertEqual(os.listdir(self.cache_dir), ["1.json"])
+
+    def test_expiry(self):
+        retronews.hn_fetch_entry(1)
+        self.makeOld(os.path.join(self.cache_dir, "1.json"))
+        self.assertEqual(retronews.hn_fetch_entry(1)["title"], "fetch 2")
+        self.assertEqual(len(self.urls), 2)
+
+    def test_bypass(self):
+        with mock.patch.object(retronews, "HN_CACHE_DIR", None):
+            retronews.hn_fetch_entry(1)
+            retronews.hn_fetch_entry(1)
+
+        self.assertEqual(len(self.urls), 2)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_prune(self):
+        for name in ["1.json", "2.json", "3.json.1.2.tmp"]:
+            with open(os.path.join(self.cache_dir, name), "w") as fp:
+                fp.write("{}")
+
+        self.makeOld(os.path.join(self.cache_dir, "1.json"))
+        self.makeOld(os.path.join(self.cache_dir, "3.json.1.2.tmp"))
+        retronews.hn_prune_cache()
+        self.assertEqual(os.listdir(self.cache_dir), ["2.json"])
+
+    def test_prune_missing_dir(self):
+        with mock.patch.object(retronews, "HN_CACHE_DIR", os.path.join(self.cache_dir, "missing")):
+            retronews.hn_prune_cache()
+
+
+def make_message(msg_id: str, thread_id: str, **kwargs) -> retronews.Message:
+    return retronews.Message(
+        msg_id=msg_id,
+        thread_id=thread_id,
+        content_location="",
+        date=datetime(2024, 1, 2, 3, 4),
+        author="author",
+        title=msg_id,
+        **kwargs,
+    )
+
+
+def make_reply(parent: retronews.Message, msg_id: str) -> retronews.Message:
+    msg = make_message(msg_id, parent.thread_id, parent=parent)
+
+    if parent.children is None:
+        parent.children = []
+
+    parent.children.append(msg)
+    return msg
+
+
+class TestDB(unittest.TestCase):
+    def setUp(self):
+        self.db = retronews.db_init(":memory:")
+        self.addCleanup(self.db.close)
+
+    def test_message_row(self):
+        for read in [False, True]:
+            for starred in [False, True]:
+                flags = retronews.MessageFlags(read=read, starred=starred)
+                msg = make_message("2@hn", "1@hn", flags=flags)
+                retronews.db_save_message(self.db, msg)
+
+                loaded = make_message("2@hn", "1@hn")
+                retronews.db_load_message_flags(self.db, {loaded.msg_id: loaded})
+                self.assertEqual(loaded.flags, flags)
+
+    def test_empty_ids(self):
+        retronews.db_save_messages(self.db, [])
+        retronews.db_load_message_flags(self.db, {})
+        retronews.db_load_read_comments(self.db, {})
+        self.assertEqual(retronews.db_load_starred_thread_ids(self.db), [])
+
+    def test_unknown_ids(self):
+        msg = make_message("1@hn", "1@hn")
+        retronews.db_load_message_flags(self.db, {msg.msg_id: msg})
+        retronews.db_load_read_comments(self.db, {msg.msg_id: msg})
+        self.assertEqual(msg.flags, retronews.MessageFlags())
+        self.assertEqual(msg.read_comments, 0)
+
+    def test_read_comments(self):
+        read = retronews.MessageFlags(read=True)
+        messages = [
+            make_message("1@hn", "1@hn", flags=read),
+            make_message("2@hn", "1@hn", flags=read),
+            make_message("3@hn", "1@hn"),
+            make_message("4@hn", "4@hn"),
+            make_message("5@hn", "4@hn", flags=read),
+            make_message("6@hn", "6@hn"),
+        ]
+        retronews.db_save_messages(self.db, messages)
+
+        threads = [make_message(msg_id, msg_id) for msg_id in ["1@hn", "4@hn", "6@hn"]]
+        # Comments are only passed for reference, counts are only assigned to threads
+        comment = make_message("2@hn", "1@hn")
+        messages_by_id = {msg.msg_id: msg for msg in threads + [comment]}
+        retronews.db_load_read_comments(self.db, messages_by_id)
+
+        self.assertEqual([msg.read_comments for msg in threads], [2, 1, 0])
+        self.assertEqual(comment.read_comments, 0)
+
+    def test_starred_thread_ids(self):
+        starred = retronews.MessageFlags(starred=True)
+        messages = [
+            make_message("1@hn", "1@hn", flags=starred),
+            make_message("2@hn", "1@hn", flags=starred),
+            make_message("3@hn", "3@hn"),
+        ]
+        retronews.db_save_messages(self.db, messages)
+        self.assertEqual(retronews.db_load_starred_thread_ids(self.db), ["1@hn"])
+
+
+class TestTextSplitUrls(unittest.TestCase):
+    def test_split(self):
+        cases = [
+            ("", []),
+            ("no urls here", [("no urls here", False)]),
+            ("http is a protocol", [("http is a protocol", False)]),
+            ("https://a.com/x", [("https://a.com/x", True)]),
+            ("https://a.com/x foo", [("https://a.com/x", True), (" foo", False)]),
+            ("foo https://a.com/x", [("foo ", False), ("https://a.com/x", True)]),
+            ("see https://a.com/x.", [("see ", False), ("https://a.com/x", True), (".", False)]),
+            ("https://a.com https://b.com", [("https://a.com", True), (" ", False), ("https://b.com", True)]),
+            ("https://a.com,https://b.com", [("https://a.com", True), (",", False), ("https://b.com", True)]),
+            ('"https://a.com"http://b.c', [('"', False), ("https://a.com", True), ('"', False), ("http://b.c", True)]),
+        ]
+
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(retronews.text_split_urls(text), expected)
+
+                # Same runs as classifying every part of the split separately
+                parts = [p for p in retronews.URL_REX.split(text) if p != ""]
+                classified = [(p, retronews.URL_REX.fullmatch(p) is not None) for p in parts]
+                self.assertEqual(retronews.text_split_urls(text), classified)
+
+
+class TestMsgFlattenThread(unittest.TestCase):
+    def makeThread(self) -> retronews.Message:
+        root = make_message("root", "root")
+        a = make_reply(root, "a")
+        make_reply(a, "a1")
+        make_reply(a, "a2")
+        b = make_reply(root, "b")
+        make_reply(b, "b1")
+        return root
+
+    def test_nested(self):
+        messages = retronews.msg_flatten_thread(self.makeThread())
+
+        self.assertEqual(
+            [(msg.msg_id, msg.index_tree) for msg in messages],
+            [
+                ("root", ""),
+                ("a", "├─> "),
+                ("a1", "│ ├─> "),
+                ("a2", "│ └─> "),
+                ("b", "└─> "),
+                ("b1", "  └─> "),
+            ],
+        )
+
+    def test_nested_ascii(self):
+        messages = retronews.msg_flatten_thread(self.makeThread(), ascii=True)
+
+        self.assertEqual(
+            [msg.index_tree for msg in messages],
+            ["", "|-> ", "| |-> ", "| '-> ", "'-> ", "  '-> "],
+        )
+
+    def test_deep_chain(self):
+        depth = 5000
+        root = msg = make_message("root", "root")
+
+        for i in range(depth):
+            msg = make_reply(msg, str(i))
+
+        messages = retronews.msg_flatten_thread(root)
+
+        self.assertEqual([msg.msg_id for msg in messages], ["root"] + [str(i) for i in range(depth)])
+        self.assertEqual(messages[-1].index_tree, "  " * (depth - 1) + "└─> ")
+
+
+def make_hn_entry(entry_id: int, children: list, title: str = "", url: str = "") -> dict:
+    return {
+        "author": "author",
+        "children": children,
+        "created_at_i": 1700000000 + entry_id,
+        "id": entry_id,
+        "parent_id": None,
+        "text": f"<p>text {entry_id}</p>",
+        "title": title or None,
+        "url": url or None,
+    }
+
+
+class TestHNParseEntry(unittest.TestCase):
+    def test_nested(self):
+        entry = make_hn_entry(
+            1,
+            [make_hn_entry(2, [make_hn_entry(3, []), make_hn_entry(4, [])]), make_hn_entry(5, [])],
+            title="Story &amp; title",
+            url="https://a.com",
+        )
+        root = retronews.hn_parse_entry(entry)
+
+        self.assertIsNone(root.parent)
+        self.assertEqual(root.title, "Story & title")
+        self.assertEqual(root.body, "<p>https://a.com</p><p>text 1</p>")
+
+        messages = retronews.msg_flatten_thread(root)
+
+        self.assertEqual(
+            [(msg.msg_id, msg.thread_id, msg.parent and msg.parent.msg_id, msg.title) for msg in messages],
+            [
+                ("1@hn", "1@hn", None, "Story & title"),
+                ("2@hn", "1@hn", "1@hn", "Re: Story & title"),
+                ("3@hn", "1@hn", "2@hn", "Re: Story & title"),
+                ("4@hn", "1@hn", "2@hn", "Re: Story & title"),
+                ("5@hn", "1@hn", "1@hn", "Re: Story & title"),
+            ],
+        )
+        self.assertEqual([msg.index_tree for msg in messages], ["", "├─> ", "│ ├─> ", "│ └─> ", "└─> "])
+
+    def test_deep_chain(self):
+        depth = 5000
+        entry = make_hn_entry(depth, [])
+
+        for i in range(depth - 1, 0, -1):
+            entry = make_hn_entry(i, [entry])
+
+        msg = retronews.hn_parse_entry(entry)
+        msg_ids = []
+
+        while msg.children:
+            self.assertEqual(len(msg.children), 1)
+            self.assertIs(msg.children[0].parent, msg)
+            msg_ids.append(msg.msg_id)
+            msg = msg.children[0]
+
+        msg_ids.append(msg.msg_id)
+        self.assertEqual(msg_ids, [f"{i}@hn" for i in range(1, depth + 1)])
+        self.assertEqual(msg.thread_id, "1@hn")
+
+
+class TestTextQuotePrefix(unittest.TestCase):
+    # Regex used before text_quote_prefix()
+    QUOTE_REX = re.compile(r"^(> ?)+")
+
+    def test_prefix(self):
+        cases = [
+            ("", ""),
+            (">", ">"),
+            ("> ", "> "),
+            (">text", ">"),
+            ("> text", "> "),
+            (">>text", ">>"),
+            (">> text", ">> "),
+            ("> > text", "> > "),
+            (">  text", "> "),
+            ("> >> > text", "> >> > "),
+            (" > text", ""),
+            ("  > text", ""),
+            ("text > quote", ""),
+            ("a > b", ""),
+            ("->", ""),
+            ("<> text", ""),
+        ]
+
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(retronews.text_quote_prefix(text), expected)
+
+                match = self.QUOTE_REX.match(text)
+                self.assertEqual(retronews.text_quote_prefix(text), match[0] if match else "")
 
 
 def setup_test_cases():